@@ -0,0 +1,175 @@
+import numpy as np
+
+# the functions work on trajectory arrays of shape (steps, bodies, 2), in memory or memory mapped with
+# Trajectory.load_recording, and only read chunk_steps steps at a time
+
+
+def get_chunks(steps, chunk_steps):
+    """
+    generates slices covering all the steps of a trajectory
+    """
+    for start in range(0, steps, chunk_steps):
+        yield slice(start, min(start + chunk_steps, steps))
+
+
+def get_velocities(positions, time_step, chunk_steps=2 ** 16):
+    """
+    estimates the velocities from the positions with central differences,
+    for trajectories that were saved without velocities
+    """
+    steps = len(positions)
+    velocities = np.empty(positions.shape)
+    for chunk in get_chunks(steps, chunk_steps):
+        # one extra step on each side so that the differences at the chunk edges are central too
+        start = max(chunk.start - 1, 0)
+        stop = min(chunk.stop + 1, steps)
+        gradient = np.gradient(np.asarray(positions[start:stop], dtype=np.float64), time_step, axis=0)
+        velocities[chunk] = gradient[chunk.start - start:chunk.stop - start]
+    return velocities
+
+
+def get_year_stats(positions, time_step, start_time=0, chunk_steps=2 ** 16):
+    """
+    returns the average orbital period of each body and the associated deviation, counting the crossings of the
+    +x axis in the same way as Planet.check_new_year, positions[0] being the positions at start_time
+    (0 for Trajectory.load_recording, time_step for Trajectory.load_trajectory)
+    bodies that never crossed the axis get float('inf')
+    """
+    bodies = positions.shape[1]
+    count = np.zeros(bodies, dtype=np.int64)
+    last_new_year = np.zeros(bodies)
+    # the sums are of the differences from the first period of each body, so that the deviation does not lose
+    # precision when it is much smaller than the period
+    first_period = np.zeros(bodies)
+    shifted_sum = np.zeros(bodies)
+    shifted_square_sum = np.zeros(bodies)
+
+    for chunk in get_chunks(len(positions) - 1, chunk_steps):
+        # the y coordinate at the start and at the end of every step of the chunk
+        y = np.asarray(positions[chunk.start:chunk.stop + 1, :, 1], dtype=np.float64)
+        step, body = np.nonzero((y[:-1] < 0) & (0 < y[1:]))
+        timestep_percentage = y[step, body] / (y[step, body] - y[step + 1, body])
+        new_years = start_time + (chunk.start + step + timestep_percentage) * time_step
+
+        # np.nonzero returns the crossings step by step, so they are sorted by time once sorted by body
+        order = np.argsort(body, kind="stable")
+        body, new_years = body[order], new_years[order]
+        first = np.r_[True, body[1:] != body[:-1]]
+        previous = np.where(first, last_new_year[body], np.r_[0., new_years[:-1]])
+        periods = new_years - previous
+        start = first & (count[body] == 0)
+        first_period[body[start]] = periods[start]
+        shifted = periods - first_period[body]
+        np.add.at(shifted_sum, body, shifted)
+        np.add.at(shifted_square_sum, body, shifted ** 2)
+        np.add.at(count, body, 1)
+        last_new_year[body] = new_years
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average_period = np.where(count > 0, last_new_year / count, float('inf'))
+        variance = np.where(count > 0, shifted_square_sum / count - (shifted_sum / count) ** 2, float('inf'))
+    return average_period, np.sqrt(np.maximum(variance, 0))
+
+
+def get_orbital_elements(positions, velocities, masses, g, centre=0, skip=1, chunk_steps=2 ** 16):
+    """
+    returns the osculating semi-major axis a, eccentricity e and argument of periapsis ω (in radians) of every body
+    around the centre body in every skip-th step, as arrays of shape (steps, bodies)
+    the centre body itself gets nan
+    """
+    masses = np.asarray(masses, dtype=np.float64)
+    mu = g * (masses[centre] + masses)
+    steps = len(range(0, len(positions), skip))
+    semi_major_axis = np.empty((steps, len(masses)))
+    eccentricity = np.empty((steps, len(masses)))
+    periapsis = np.empty((steps, len(masses)))
+
+    for chunk in get_chunks(steps, chunk_steps):
+        rows = slice(chunk.start * skip, chunk.stop * skip, skip)
+        pos = np.asarray(positions[rows], dtype=np.float64)
+        vel = np.asarray(velocities[rows], dtype=np.float64)
+        r = pos - pos[:, centre:centre + 1]
+        v = vel - vel[:, centre:centre + 1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distance = np.sqrt(np.einsum("tbk,tbk->tb", r, r))
+            speed_square = np.einsum("tbk,tbk->tb", v, v)
+            radial_speed = np.einsum("tbk,tbk->tb", r, v)
+            # the eccentricity vector ((v^2 - mu/r) r - (r.v) v) / mu
+            e_vec = ((speed_square - mu / distance)[..., None] * r - radial_speed[..., None] * v) / mu[:, None]
+            semi_major_axis[chunk] = 1 / (2 / distance - speed_square / mu)
+        eccentricity[chunk] = np.sqrt(np.einsum("tbk,tbk->tb", e_vec, e_vec))
+        periapsis[chunk] = np.arctan2(e_vec[..., 1], e_vec[..., 0])
+
+    for elements in (semi_major_axis, eccentricity, periapsis):
+        elements[:, centre] = np.nan
+    return semi_major_axis, eccentricity, periapsis
+
+
+def get_conserved_quantities(positions, velocities, masses, g, chunk_steps=2 ** 16):
+    """
+    returns the total energy in joules and the total angular momentum (in earth masses AU^2 yr^-1)
+    of the system in every step
+    """
+    masses = np.asarray(masses, dtype=np.float64)
+    first, second = np.triu_indices(len(masses), 1)
+    mass_products = masses[first] * masses[second]
+    energy = np.empty(len(positions))
+    angular_momentum = np.empty(len(positions))
+
+    for chunk in get_chunks(len(positions), chunk_steps):
+        pos = np.asarray(positions[chunk], dtype=np.float64)
+        vel = np.asarray(velocities[chunk], dtype=np.float64)
+        kinetic = np.einsum("b,tbk,tbk->t", masses, vel, vel) / 2
+        dist_vec = pos[:, second] - pos[:, first]
+        potential = -g * (mass_products / np.sqrt(np.einsum("tpk,tpk->tp", dist_vec, dist_vec))).sum(axis=1)
+        energy[chunk] = kinetic + potential
+        angular_momentum[chunk] = masses @ (pos[..., 0] * vel[..., 1] - pos[..., 1] * vel[..., 0]).T
+
+    # same conversion from earth masses AU^2 yr^-2 to joules as in PlanetarySystem
+    c = (5.97219e+24 * 1.496e+11 * 1.496e+11) / (3.154e+7 * 3.154e+7)
+    return c * energy, angular_momentum
+
+
+def get_drift(values):
+    """
+    returns the change of a conserved quantity relative to its initial value in every step
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return (values - values[0]) / abs(values[0])
+
+
+def get_close_approaches(positions, time_step, start_time=0, chunk_steps=2 ** 16):
+    """
+    returns the closest approach of every pair of bodies as a list of (body1, body2, distance, time) tuples
+    sorted by distance, positions[0] being the positions at start_time
+    (0 for Trajectory.load_recording, time_step for Trajectory.load_trajectory)
+    """
+    bodies = positions.shape[1]
+    first, second = np.triu_indices(bodies, 1)
+    closest_square = np.full(len(first), np.inf)
+    closest_step = np.zeros(len(first), dtype=np.int64)
+
+    for chunk in get_chunks(len(positions), chunk_steps):
+        pos = np.asarray(positions[chunk], dtype=np.float64)
+        dist_vec = pos[:, second] - pos[:, first]
+        dist_square = np.einsum("tpk,tpk->tp", dist_vec, dist_vec)
+        step = dist_square.argmin(axis=0)
+        chunk_min = dist_square[step, np.arange(len(first))]
+        closer = chunk_min < closest_square
+        closest_square[closer] = chunk_min[closer]
+        closest_step[closer] = chunk.start + step[closer]
+
+    order = np.argsort(closest_square)
+    return [(first[i], second[i], np.sqrt(closest_square[i]), start_time + closest_step[i] * time_step)
+            for i in order]
+
+
+def print_close_approaches(positions, time_step, names=None, count=10, start_time=0):
+    """
+    prints the closest approaches of the pairs of bodies that came closest to each other
+    """
+    for body1, body2, distance, time in get_close_approaches(positions, time_step, start_time)[:count]:
+        if names is not None:
+            body1, body2 = names[body1], names[body2]
+        print(f"{body1} and {body2} came within {distance} AU of each other at time {time} years")
@@ -0,0 +1,186 @@
+import argparse
+import time
+import numpy as np
+from PlanetarySystem import PlanetarySystem
+
+
+def create_system(args):
+    """
+    creates the system described by the parameter file, with the step options of the command line applied
+    """
+    if args.compact or args.float32 or args.particles:
+        from CompactSystem import CompactPlanetarySystem
+        system = CompactPlanetarySystem(args.parameters, integrator=args.integrator,
+                                        dtype=np.float32 if args.float32 else np.float64)
+        if args.particles:
+            system.add_ring(args.particles, args.ring[0], args.ring[1], seed=0)
+    else:
+        system = PlanetarySystem(args.parameters, integrator=args.integrator)
+    if args.timestep is not None:
+        system.step = args.timestep
+    if args.steps is not None:
+        system.limit = args.steps
+    return system
+
+
+def run_simulate(args):
+    """
+    runs a simulation and optionally writes the trajectory to a file
+    """
+    system = create_system(args)
+    if args.output and not isinstance(system, PlanetarySystem):
+        raise SystemExit("trajectory files can only be written without --compact, --float32 or --particles")
+    start = time.perf_counter()
+    if args.output:
+        system.simulate_to_file(args.output)
+    else:
+        system.run_simulation()
+    print(f"simulated {len(system.energy_history)} steps in {time.perf_counter() - start} seconds")
+
+
+def run_energy(args):
+    """
+    runs a simulation and prints the energy statistics, as in Experiment2
+    """
+    system = create_system(args)
+    system.run_simulation()
+    system.print_energy_stats()
+
+
+def run_years(args):
+    """
+    runs a simulation and prints the orbital periods, as in Experiment1
+    """
+    system = create_system(args)
+    system.run_simulation()
+    system.print_years()
+
+
+def run_mission(args):
+    """
+    searches for the launch conditions of the mars mission, as in Experiment3
+    """
+    from MarsMission import MarsMission
+    mission = MarsMission(args.rocket_mass, args.min_vel, args.max_vel, args.distance, args.goal_distance,
+                          args.parameters)
+    mission.calculate_trajectory(args.angle_nums, args.vel_nums, max_years=args.max_years, optimizer=args.optimizer,
+                                 workers=args.workers, max_iterations=args.max_iterations,
+                                 max_evaluations=args.max_evaluations, time_limit=args.time_limit)
+
+
+def run_sweep(args):
+    """
+    creates or continues a sweep over launch conditions stored in a sqlite database and prints the best trials
+    """
+    from Sweep import Sweep
+    sweep = Sweep(args.database)
+    if sum(sweep.get_progress()) > 0:
+        # the settings and trials of an existing sweep are kept in the database, so new ones would be ignored
+        ignored = [name for name, default in args.creation_defaults.items() if getattr(args, name) != default]
+        if args.parameters is not None:
+            ignored.insert(0, "parameters")
+        if ignored:
+            raise SystemExit(f"{args.database} already holds a sweep, remove these options to continue it: "
+                             + ", ".join(ignored))
+    else:
+        if args.parameters is None:
+            raise SystemExit("a parameter file is needed to create a new sweep")
+        sweep.configure(args.rocket_mass, args.min_vel, args.max_vel, args.distance, args.goal_distance,
+                        args.parameters, args.max_years)
+        sweep.add_grid(args.angle_nums, args.vel_nums, args.epochs, args.timesteps)
+    if not args.status:
+        sweep.run(args.workers)
+    pending, running, done, failed = sweep.get_progress()
+    print(f"{done} trials finished, {failed} failed, {running} running and {pending} pending")
+    for angle, velocity, epoch, timestep, closest_dist, closest_time in sweep.get_best(args.best):
+        print(f"closest approach = {closest_dist} AU at time {closest_time} years with angle {angle} radians, "
+              f"speed {velocity} AU/year, epoch {epoch} years and timestep {timestep} years")
+
+
+def run_render(args):
+    """
+    renders a trajectory file to a gif or mp4
+    """
+    from Renderer import render_trajectory
+    render_trajectory(args.trajectory, args.output, args.skip, tuple(args.size), args.dpi, args.trail, args.fps,
+                      args.workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="runs the experiments without any plotting")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # options shared by all the commands that run a simulation
+    simulation = argparse.ArgumentParser(add_help=False)
+    simulation.add_argument("parameters", help="parameter file, e.g. 'parameters-solar (1).txt'")
+    simulation.add_argument("--integrator", choices=("beeman", "euler"), default="beeman")
+    simulation.add_argument("--steps", type=int, help="overrides the number of iterations of the parameter file")
+    simulation.add_argument("--timestep", type=float, help="overrides the timestep of the parameter file")
+    simulation.add_argument("--compact", action="store_true", help="use CompactPlanetarySystem")
+    simulation.add_argument("--float32", action="store_true", help="compact system with float32 storage")
+    simulation.add_argument("--particles", type=int, default=0, help="number of test particles, implies --compact")
+    simulation.add_argument("--ring", type=float, nargs=2, default=(2.0, 3.4),
+                            help="inner and outer radius of the ring of test particles in AU")
+
+    command = commands.add_parser("simulate", parents=[simulation], help="run a simulation")
+    command.add_argument("-o", "--output", help="write the trajectory to this file")
+    command.set_defaults(func=run_simulate)
+
+    command = commands.add_parser("energy", parents=[simulation], help="print the energy statistics")
+    command.set_defaults(func=run_energy)
+
+    command = commands.add_parser("years", parents=[simulation], help="print the orbital periods")
+    command.set_defaults(func=run_years)
+
+    # options shared by the commands about the mars mission, the defaults are the ones of Experiment3
+    mission = argparse.ArgumentParser(add_help=False)
+    mission.add_argument("--rocket-mass", type=float, default=3.65025e-22, help="in earth masses")
+    mission.add_argument("--min-vel", type=float, default=2.0, help="in AU/year")
+    mission.add_argument("--max-vel", type=float, default=2.6, help="in AU/year")
+    mission.add_argument("--distance", type=float, default=1.e-3, help="launch distance from earth in AU")
+    mission.add_argument("--goal-distance", type=float, default=0.00013588429, help="in AU")
+    mission.add_argument("--angle-nums", type=int, default=15)
+    mission.add_argument("--vel-nums", type=int, default=7)
+    mission.add_argument("--max-years", type=float, default=1)
+
+    command = commands.add_parser("mission", parents=[mission], help="search the launch conditions of the mars mission")
+    command.add_argument("parameters", help="parameter file, e.g. 'parameters-solar (3).txt'")
+    command.add_argument("--optimizer", choices=("hill_climb", "pattern_search"), default="hill_climb")
+    command.add_argument("--workers", type=int, default=None, help="worker processes for pattern_search")
+    command.add_argument("--max-iterations", type=int, default=200, help="iterations per pattern_search refinement")
+    command.add_argument("--max-evaluations", type=int, default=None,
+                         help="simulations allowed to all the pattern_search refinements together")
+    command.add_argument("--time-limit", type=float, default=None,
+                         help="seconds allowed to all the pattern_search refinements together")
+    command.set_defaults(func=run_mission)
+
+    command = commands.add_parser("sweep", parents=[mission],
+                                  help="run or continue a sweep of launch conditions stored in a database")
+    command.add_argument("database", help="sqlite file holding the trials and results")
+    command.add_argument("parameters", nargs="?", help="parameter file, only needed for a new sweep")
+    command.add_argument("--epochs", type=float, nargs="+", default=[0.], help="launch times in years")
+    command.add_argument("--timesteps", type=float, nargs="+", default=[0.001], help="in years")
+    command.add_argument("--workers", type=int, default=None)
+    command.add_argument("--best", type=int, default=10, help="number of best trials printed")
+    command.add_argument("--status", action="store_true", help="only print the progress and the best trials")
+    command.set_defaults(func=run_sweep, creation_defaults={
+        name: command.get_default(name) for name in ("rocket_mass", "min_vel", "max_vel", "distance", "goal_distance",
+                                                     "angle_nums", "vel_nums", "max_years", "epochs", "timesteps")})
+
+    command = commands.add_parser("render", help="render a trajectory file to a gif or mp4")
+    command.add_argument("trajectory")
+    command.add_argument("-o", "--output", default="trajectory.gif")
+    command.add_argument("--skip", type=int, default=90)
+    command.add_argument("--size", type=float, nargs=2, default=(6.4, 4.8), help="figure size in inches")
+    command.add_argument("--dpi", type=int, default=100)
+    command.add_argument("--trail", type=int, default=0)
+    command.add_argument("--fps", type=int, default=30)
+    command.add_argument("--workers", type=int, default=None)
+    command.set_defaults(func=run_render)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
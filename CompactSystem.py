@@ -0,0 +1,393 @@
+import numpy as np
+from PlanetarySystem import PlanetarySystem
+
+
+class Body:
+    """
+    lightweight handle to one body of a CompactPlanetarySystem, it stores no data of its own and
+    reads everything from the arrays of the system
+    """
+    __slots__ = ("system", "index")
+
+    def __init__(self, system, index):
+        self.system = system
+        self.index = index
+
+    @property
+    def name(self):
+        return self.system.get_name(self.index)
+
+    @property
+    def colour(self):
+        return self.system.get_colour(self.index)
+
+    @property
+    def mass(self):
+        return self.system.get_mass(self.index)
+
+    @property
+    def pos(self):
+        group, i = self.system.get_group(self.index)
+        return group.pos[i]
+
+    @property
+    def vel(self):
+        group, i = self.system.get_group(self.index)
+        return group.vel[i]
+
+    @property
+    def acc(self):
+        group, i = self.system.get_group(self.index)
+        return group.acc[i]
+
+    def get_year_stats(self):
+        """
+        returns the body's average orbital period and the associated deviation
+        """
+        return self.system.get_year_stats(self.index)
+
+    def get_kinetic_energy(self):
+        """
+        returns the kinetic energy of the body
+        """
+        vel = self.vel.astype(np.float64)
+        return self.mass * np.dot(vel, vel) / 2
+
+    def __str__(self):
+        return self.name
+
+
+class BodyArrays:
+    """
+    the positions, velocities, accelerations and optionally the year statistics of a group of bodies,
+    stored in arrays of one type
+    """
+    __slots__ = ("pos", "vel", "acc", "acc_old", "year_counts", "last_new_year", "first_period", "shifted_sum",
+                 "shifted_square_sum")
+
+    def __init__(self, positions, velocities, dtype, track_years):
+        self.pos = np.array(positions, dtype=dtype).reshape(-1, 2)
+        self.vel = np.array(velocities, dtype=dtype).reshape(-1, 2)
+        self.acc = np.zeros_like(self.pos)
+        self.acc_old = np.zeros_like(self.pos)
+
+        # instead of a list of new years, only the number of years, the time of the last new year and the sums of
+        # the periods and squared periods are kept for each body, which is enough for the average period and its
+        # deviation. the sums are of the differences from the first period, so the deviation does not lose
+        # precision when it is much smaller than the period
+        self.year_counts = None
+        self.last_new_year = None
+        self.first_period = None
+        self.shifted_sum = None
+        self.shifted_square_sum = None
+        if track_years:
+            self.year_counts = np.zeros(len(self.pos), dtype=np.int32)
+            self.last_new_year = np.zeros(len(self.pos))
+            self.first_period = np.zeros(len(self.pos))
+            self.shifted_sum = np.zeros(len(self.pos))
+            self.shifted_square_sum = np.zeros(len(self.pos))
+
+    def __len__(self):
+        return len(self.pos)
+
+    def grow(self, count):
+        """
+        makes room for count more bodies with zero acceleration and returns the slice of the new rows,
+        every array is allocated once at its final size
+        """
+        old_count = len(self.pos)
+        for name in self.__slots__:
+            old = getattr(self, name)
+            if old is None:
+                continue
+            new = np.empty((old_count + count,) + old.shape[1:], dtype=old.dtype)
+            new[:old_count] = old
+            if name not in ("pos", "vel"):
+                new[old_count:] = 0
+            setattr(self, name, new)
+        return slice(old_count, old_count + count)
+
+    def append(self, positions, velocities):
+        """
+        adds bodies with zero acceleration to the end of the arrays
+        """
+        positions = np.asarray(positions).reshape(-1, 2)
+        new_rows = self.grow(len(positions))
+        self.pos[new_rows] = positions
+        self.vel[new_rows] = np.asarray(velocities).reshape(-1, 2)
+
+
+class CompactPlanetarySystem:
+    """
+    represents the solar system with the state of every body stored in a few shared arrays instead of one
+    Planet object per body, so that very large numbers of massless test particles can be simulated.
+    the planets are always stored as float64, the test particles can be stored as float32,
+    all the arithmetic is done in float64
+    """
+    def __init__(self, filename_read, integrator="beeman", dtype=np.float64, chunk_elements=2 ** 20,
+                 track_particle_years=False):
+        # the parameter file is read by the normal PlanetarySystem, which also centers the frame of reference
+        self.load_system(PlanetarySystem(filename_read, integrator=integrator), dtype, chunk_elements,
+                         track_particle_years)
+
+    def load_system(self, system, dtype=np.float64, chunk_elements=2 ** 20, track_particle_years=False):
+        """
+        copies the planets of an existing PlanetarySystem into the arrays of this system
+        dtype is the storage type of the test particles added later
+        """
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError(f"storage type must be float32 or float64, not {self.dtype}")
+
+        # the temporary float64 arrays used in each step hold at most this many values per body
+        self.chunk_elements = chunk_elements
+
+        self.limit = system.limit
+        self.step = system.step
+        self.g = system.g
+
+        self.names = [planet.name for planet in system.planets]
+        self.colours = [planet.colour for planet in system.planets]
+        self.particle_colour = "w"
+
+        # only the planets have mass, so the masses of the test particles are not stored
+        self.masses = np.array([planet.mass for planet in system.planets], dtype=np.float64)
+        self.planets = BodyArrays([planet.pos for planet in system.planets],
+                                  [planet.vel for planet in system.planets], np.float64, True)
+        self.particles = BodyArrays(np.zeros((0, 2)), np.zeros((0, 2)), self.dtype, track_particle_years)
+
+        self.energy_history = []
+        self.total_time = 0
+        self.potential_energy = 0
+
+        if system.perform_step.__name__ == "perform_step_euler":
+            self.perform_step = self.perform_step_euler
+        else:
+            self.perform_step = self.perform_step_beeman
+
+    def __len__(self):
+        return len(self.planets) + len(self.particles)
+
+    def get_group(self, index):
+        """
+        returns the arrays holding the body with the given index and its index in them
+        """
+        if index < len(self.planets):
+            return self.planets, index
+        return self.particles, index - len(self.planets)
+
+    def get_name(self, index):
+        if index < len(self.names):
+            return self.names[index]
+        return f"particle {index}"
+
+    def get_colour(self, index):
+        if index < len(self.colours):
+            return self.colours[index]
+        return self.particle_colour
+
+    def get_mass(self, index):
+        if index < len(self.masses):
+            return self.masses[index]
+        return 0.
+
+    def get_body(self, key):
+        """
+        returns a handle to the body with the given index or name
+        """
+        if isinstance(key, str):
+            key = self.names.index(key)
+        return Body(self, key)
+
+    def bodies(self):
+        """
+        generates a handle for every body in the system
+        """
+        for i in range(len(self)):
+            yield Body(self, i)
+
+    def add_test_particles(self, positions, velocities):
+        """
+        adds massless particles that are affected by the gravity of the planets but do not affect anything
+        """
+        self.particles.append(positions, velocities)
+
+    def add_ring(self, count, inner_radius, outer_radius, seed=None):
+        """
+        adds a ring of test particles on circular orbits around the sun at random radii and angles
+        """
+        # the particles are generated in blocks straight into the storage arrays, so that no full size
+        # float64 temporaries are needed. radii and angles come from separate generators, so the ring
+        # is the same whatever the size of the blocks
+        radius_rng, angle_rng = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2)]
+        new_rows = self.particles.grow(count)
+        for block in self.get_chunks(count, 8):
+            block_count = len(range(count)[block])
+            radius = radius_rng.uniform(inner_radius, outer_radius, block_count)
+            angle = angle_rng.uniform(0, 2 * np.pi, block_count)
+            direction = np.stack((np.cos(angle), np.sin(angle)), axis=1)
+            # same circular velocity as the one given to the planets, the sun is the first body
+            speed = np.sqrt(self.g * self.masses[0] / radius)
+            rows = slice(new_rows.start + block.start, new_rows.start + block.start + block_count)
+            self.particles.pos[rows] = self.planets.pos[0] + direction * radius[:, None]
+            self.particles.vel[rows] = self.planets.vel[0] + \
+                np.stack((-direction[:, 1], direction[:, 0]), axis=1) * speed[:, None]
+
+    def get_chunks(self, length, row_size):
+        """
+        generates slices covering length bodies, small enough so that a float64 array
+        of row_size values per body in the slice holds at most chunk_elements values
+        """
+        rows = max(1, self.chunk_elements // max(1, row_size))
+        for start in range(0, length, rows):
+            yield slice(start, start + rows)
+
+    def get_accelerations(self, group, chunk):
+        """
+        returns the acceleration of the bodies in the chunk of the group in float64, caused by the planets
+        """
+        dist_vec = self.planets.pos[None, :, :] - group.pos[chunk, None, :].astype(np.float64)
+        dist_square = np.einsum("ijk,ijk->ij", dist_vec, dist_vec)
+        # a planet does not attract itself
+        with np.errstate(divide="ignore"):
+            inv_dist = np.where(dist_square > 0, 1 / np.sqrt(dist_square), 0.)
+        acc = self.g * np.einsum("ijk,ij->ik", dist_vec, self.masses * inv_dist ** 3)
+        if group is self.planets:
+            # every pair is counted twice
+            self.potential_energy += -self.g * self.masses[chunk] @ (inv_dist @ self.masses) / 2
+        return acc
+
+    def initialize_acceleration(self):
+        """
+        calculates the acceleration of every body before the first step
+        """
+        self.potential_energy = 0
+        for group in (self.planets, self.particles):
+            for chunk in self.get_chunks(len(group), 2 * len(self.masses)):
+                group.acc[chunk] = self.get_accelerations(group, chunk)
+            group.acc_old[:] = group.acc
+
+    def run_simulation(self):
+        """
+        executes a simulation without any animation
+        """
+        self.initialize_acceleration()
+        while self.total_time < self.limit * self.step:
+            self.perform_step()
+
+    def perform_step_beeman(self):
+        """
+        performs one step using beeman integration
+        """
+        for group in (self.planets, self.particles):
+            for chunk in self.get_chunks(len(group), 8):
+                pos_old = group.pos[chunk].astype(np.float64)
+                acc = group.acc[chunk].astype(np.float64)
+                group.pos[chunk] = pos_old + group.vel[chunk].astype(np.float64) * self.step + \
+                    (acc / 2 + (acc - group.acc_old[chunk]) / 6) * self.step ** 2
+                self.check_new_year(group, chunk, pos_old[:, 1])
+
+        # the new acceleration of a chunk only depends on the positions, so the velocities can be updated
+        # chunk by chunk without storing all the new accelerations
+        self.potential_energy = 0
+        for group in (self.planets, self.particles):
+            for chunk in self.get_chunks(len(group), 2 * len(self.masses)):
+                new_acc = self.get_accelerations(group, chunk)
+                acc = group.acc[chunk].astype(np.float64)
+                group.vel[chunk] = group.vel[chunk].astype(np.float64) + \
+                    (2 * new_acc + 5 * acc - group.acc_old[chunk]) * self.step / 6
+                group.acc_old[chunk] = acc
+                group.acc[chunk] = new_acc
+
+        self.energy_history.append(self.get_total_energy())
+        self.total_time += self.step
+
+    def perform_step_euler(self):
+        """
+        performs one step using euler integration
+        """
+        # all the new accelerations are calculated before any body moves
+        self.potential_energy = 0
+        for group in (self.planets, self.particles):
+            for chunk in self.get_chunks(len(group), 2 * len(self.masses)):
+                new_acc = self.get_accelerations(group, chunk)
+                group.acc_old[chunk] = group.acc[chunk]
+                group.acc[chunk] = new_acc
+
+        for group in (self.planets, self.particles):
+            for chunk in self.get_chunks(len(group), 8):
+                pos_old = group.pos[chunk].astype(np.float64)
+                vel = group.vel[chunk].astype(np.float64)
+                group.pos[chunk] = pos_old + vel * self.step
+                group.vel[chunk] = vel + group.acc[chunk].astype(np.float64) * self.step
+                self.check_new_year(group, chunk, pos_old[:, 1])
+
+        self.energy_history.append(self.get_total_energy())
+        self.total_time += self.step
+
+    def check_new_year(self, group, chunk, y_old):
+        """
+        checks which bodies of the chunk crossed the +x axis in the last step and updates their year statistics
+        """
+        if group.year_counts is None:
+            return
+        y_new = group.pos[chunk, 1].astype(np.float64)
+        crossed = np.flatnonzero((y_old < 0) & (y_new > 0))
+        if len(crossed) == 0:
+            return
+        # the time of the crossing is interpolated linearly as in Planet.check_new_year
+        timestep_percentage = y_old[crossed] / (y_old[crossed] - y_new[crossed])
+        new_year = self.total_time + self.step * timestep_percentage
+
+        crossed += chunk.start
+        period = new_year - group.last_new_year[crossed]
+        first = group.year_counts[crossed] == 0
+        group.first_period[crossed[first]] = period[first]
+        shifted = period - group.first_period[crossed]
+        group.shifted_sum[crossed] += shifted
+        group.shifted_square_sum[crossed] += shifted ** 2
+        group.last_new_year[crossed] = new_year
+        group.year_counts[crossed] += 1
+
+    def get_year_stats(self, index):
+        """
+        returns the average orbital period of a body and the associated deviation,
+        float('inf') if it never completed an orbit or if its years are not tracked
+        """
+        group, i = self.get_group(index)
+        if group.year_counts is None or group.year_counts[i] == 0:
+            return float('inf'), float('inf')
+        count = group.year_counts[i]
+        average_period = group.last_new_year[i] / count
+        variance = max(group.shifted_square_sum[i] / count - (group.shifted_sum[i] / count) ** 2, 0.)
+        return average_period, np.sqrt(variance)
+
+    def print_years(self):
+        """
+        for each planet except the sun, the method prints its average sidereal orbital period and uncertainty
+        """
+        for i, name in enumerate(self.names):
+            if name != "sun":
+                year_stats = self.get_year_stats(i)
+                print(f"{name} has average orbital period {year_stats[0] * 365.25} ± {year_stats[1] * 365.25} earth days")
+
+    def print_energy_stats(self):
+        """
+        prints the average energy of the system and the associated deviation
+        """
+        energy = np.array(self.energy_history)
+        print(f"The mean energy was {energy.mean()} Joules with a standard deviation of {energy.std()} Joules")
+
+    def get_kinetic_energy(self):
+        """
+        returns the kinetic energy of the system, the test particles have no mass and add nothing
+        """
+        return self.masses @ np.einsum("ij,ij->i", self.planets.vel, self.planets.vel) / 2
+
+    def get_total_energy(self):
+        """
+        returns the total energy of the system in joules
+        """
+        # same conversion from earth masses AU^2 yr^-2 to joules as in PlanetarySystem
+        c = (5.97219e+24 * 1.496e+11 * 1.496e+11) / (3.154e+7 * 3.154e+7)
+        return c * (self.get_kinetic_energy() + self.potential_energy)
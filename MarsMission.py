@@ -1,12 +1,21 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from Planet import Planet
 from PlanetarySystem import PlanetarySystem
 from Rocket import Rocket
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import functools
+import os
+import time
 import copy
 
 
+def evaluate_launch(mission, angle, velocity, max_years):
+    """
+    runs one simulation of the mission, defined at module level so that it can run in a worker process
+    """
+    return mission.create_simulation(angle, velocity, max_years)
+
+
 class MarsMission:
     """
     this class handles the calculations for the optimal mars mission
@@ -19,13 +28,15 @@ class MarsMission:
         self.max_vel = max_vel
         self.distance = distance_earth  # the initial distance from the earth
         self.goal_distance = goal_distance  # the desired minimum distance from the earth
+        self.launch_system = None  # the last system returned by get_launch_system and its epoch and timestep
 
-    def create_simulation(self, angle, velocity, max_years):
+    def create_simulation(self, angle, velocity, max_years, epoch=0, verbose=True):
         """
         creates a simulation where the rocket has the specified
+        the rocket is launched after the planets have moved for epoch years
         """
-        system = copy.deepcopy(self.system_plain)  # copies the prototype system
-        system.limit = max_years/self.step
+        system = copy.deepcopy(self.get_launch_system(epoch))  # copies the prototype system
+        system.limit = (system.total_time + max_years)/self.step
         for planet in system.planets:
             if planet.name == "earth":
                 earth = planet
@@ -34,9 +45,25 @@ class MarsMission:
         rocket = Rocket(earth.pos, earth.vel, self.rocket_mass, self.distance, angle, velocity, mars)
         system.planets.insert(2, rocket)  # inserts the rocket into the list of planets of the system
         system.run_simulation()
-        print(f"closest approach = {rocket.closest_dist} AU at time {rocket.closest_time} years with angle {angle} radians and speed {velocity} AU/year")
+        if verbose:
+            print(f"closest approach = {rocket.closest_dist} AU at time {rocket.closest_time} years with angle {angle} radians and speed {velocity} AU/year")
         return rocket.closest_dist, rocket.closest_time
 
+    def get_launch_system(self, epoch):
+        """
+        returns the system without rocket after the planets have moved for epoch years. The last one is kept, so
+        consecutive simulations with the same epoch and timestep do not simulate the planets through the epoch again
+        """
+        if epoch == 0:
+            return self.system_plain
+        key = (epoch, self.step)
+        if self.launch_system is None or self.launch_system[0] != key:
+            system = copy.deepcopy(self.system_plain)
+            system.limit = epoch/self.step
+            system.run_simulation()
+            self.launch_system = (key, system)
+        return self.launch_system[1]
+
     def run_animation(self, angle, velocity):
         """
         runs an animation with the specified initial conditions
@@ -54,22 +81,28 @@ class MarsMission:
         print(f"closest approach = {rocket.closest_dist} AU")
         print(f"time of closest approach = {rocket.closest_time} years")
 
-    def search_range(self, angle_nums, vel_nums, max_years):
+    def search_range(self, angle_nums, vel_nums, max_years, executor=None):
         """
         divides the range of available speeds and angles into a specified number of values,
         checks every combination of speed and angle,
         and finds which one of those results in the smallest closest approach to mars
+        if an executor is given the combinations are simulated concurrently in it
         """
-        outcome_dict = {}  # dictonary of all the possibilities checked
+        conditions = []
         for i in range(angle_nums):
             for j in range(vel_nums):
                 angle = 2*np.pi*i/angle_nums
                 velocity = self.min_vel + j*(self.max_vel-self.min_vel)/(vel_nums - 1)
-                outcome = self.create_simulation(angle, velocity, max_years)
+                conditions.append((angle, velocity))
+
+        if executor is None:
+            outcomes = [self.create_simulation(angle, velocity, max_years) for angle, velocity in conditions]
+        else:
+            outcomes = executor.map(evaluate_launch, repeat(self), *zip(*conditions), repeat(max_years))
 
-                # the stating conditions work as a key
-                # a tuple containing the closest approach and corresponding time are the value
-                outcome_dict.update({(angle, velocity): outcome})
+        # the stating conditions work as a key
+        # a tuple containing the closest approach and corresponding time are the value
+        outcome_dict = dict(zip(conditions, outcomes))  # dictonary of all the possibilities checked
 
         min_dist = (0, self.min_vel)  # default value for best starting conditions
         # the optimal starting conditions are calculated
@@ -94,9 +127,9 @@ class MarsMission:
             print("Goal reached!")
             print(f"the optimal angle is {initial_angle} radians")
             print(f"the optimal speed is {initial_vel} AU/year")
-            dist, time = self.create_simulation(initial_angle, initial_vel, max_years)
+            dist, travel_time = self.create_simulation(initial_angle, initial_vel, max_years)
             print(f"the final closest distance is {dist} AU")
-            print(f"the final travel time is {time} years")
+            print(f"the final travel time is {travel_time} years")
             print(f"The final increments were: vel={vel_step} and angle={angle_step}")
             print(f"Max depth remaining = {max_depth}")
             return initial_angle, initial_vel
@@ -106,9 +139,9 @@ class MarsMission:
             print("maximum recursion depth reached")
             print(f"the optimal angle is {initial_angle} radians")
             print(f"the optimal speed is {initial_vel} AU/year")
-            dist, time = self.create_simulation(initial_angle, initial_vel, max_years)
+            dist, travel_time = self.create_simulation(initial_angle, initial_vel, max_years)
             print(f"the final closest distance is {dist} AU")
-            print(f"the final travel time is {time} years")
+            print(f"the final travel time is {travel_time} years")
             print(f"The final increments were: vel={vel_step} and angle={angle_step}")
             print(f"The final increments were: vel={vel_step} and angle={angle_step}")
             return
@@ -145,21 +178,133 @@ class MarsMission:
         return self.hill_climb(initial_distance, initial_angle, initial_vel, angle_step / 2, vel_step / 2,
                                max_years, max_depth - 1)
 
-    def calculate_trajectory(self, angle_nums=15, vel_nums=7, angle_step=0.1, vel_step=0.1, max_years=1, max_depth=200):
+    def get_pattern(self, angle, velocity, angle_step, vel_step, scales):
+        """
+        returns the candidate launch conditions around the given ones, moving the angle and/or the velocity by the
+        increments multiplied by each scale, leaving out velocities outside of the allowed range
+        """
+        candidates = []
+        for scale in scales:
+            for angle_move in (-1, 0, 1):
+                for vel_move in (-1, 0, 1):
+                    if angle_move == vel_move == 0:
+                        continue
+                    new_vel = velocity + vel_move * vel_step * scale
+                    if self.min_vel <= new_vel <= self.max_vel:
+                        candidates.append((angle + angle_move * angle_step * scale, new_vel))
+        return candidates
+
+    def pattern_search(self, initial_distance, initial_angle, initial_vel, angle_step, vel_step, max_years,
+                       max_iterations=200, max_evaluations=None, time_limit=None, workers=None, executor=None,
+                       callback=None, min_step=1e-7, budget=None):
+        """
+        iterative alternative to hill_climb. In every iteration all the moves of the angle and velocity by the
+        current increments (and by smaller fractions of them, enough to keep every worker busy) are simulated
+        concurrently and the best one is taken. If none of them is an improvement the increments are halved.
+        The search stops when the goal distance is reached or when the number of iterations, the number of
+        simulations or the time in seconds runs out, and returns the best angle and velocity found.
+        It also stops once both increments are smaller than min_step, as smaller moves no longer matter.
+        callback is called with the iteration, distance, angle and velocity after every iteration
+        budget is a dictionary with the "start" time (time.perf_counter) and the number of "evaluations" already
+        made, it lets several calls share the same limits on simulations and time and is updated by each call
+        """
+        if executor is None:
+            with ProcessPoolExecutor(workers) as executor:
+                return self.pattern_search(initial_distance, initial_angle, initial_vel, angle_step, vel_step,
+                                           max_years, max_iterations, max_evaluations, time_limit, workers,
+                                           executor, callback, min_step, budget)
+
+        # each scale adds 8 moves, so enough scales are used to give every worker at least one simulation
+        workers = workers or os.cpu_count() or 1
+        scales = [0.5 ** i for i in range(max(1, -(-workers // 8)))]
+
+        if budget is None:
+            budget = {"start": time.perf_counter(), "evaluations": 0}
+        start = budget["start"]
+        evaluations = budget["evaluations"]
+        distance, angle, velocity = initial_distance, initial_angle, initial_vel
+        iteration = 0
+        while distance >= self.goal_distance and iteration < max_iterations:
+            if time_limit is not None and time.perf_counter() - start > time_limit:
+                print("time limit reached", flush=True)
+                break
+            if angle_step < min_step and vel_step < min_step:
+                print("minimum increment reached", flush=True)
+                break
+            candidates = self.get_pattern(angle, velocity, angle_step, vel_step, scales)
+            if max_evaluations is not None:
+                if evaluations >= max_evaluations:
+                    print("evaluation limit reached", flush=True)
+                    break
+                candidates = candidates[:max_evaluations - evaluations]
+
+            outcomes = list(executor.map(evaluate_launch, repeat(self), *zip(*candidates), repeat(max_years)))
+            evaluations += len(candidates)
+            budget["evaluations"] = evaluations
+            iteration += 1
+
+            best = min(range(len(candidates)), key=lambda i: outcomes[i][0])
+            if outcomes[best][0] < distance:
+                distance = outcomes[best][0]
+                angle, velocity = candidates[best]
+            else:
+                # none of the moves is an improvement, so the size of the increments is decreased
+                angle_step = angle_step / 2
+                vel_step = vel_step / 2
+
+            print(f"iteration {iteration}: closest distance {distance} AU with angle {angle} radians and speed "
+                  f"{velocity} AU/year, increments angle={angle_step} and vel={vel_step}, "
+                  f"{evaluations} simulations", flush=True)
+            if callback is not None:
+                callback(iteration, distance, angle, velocity)
+
+        if distance < self.goal_distance:
+            print("Goal reached!")
+        print(f"the optimal angle is {angle} radians")
+        print(f"the optimal speed is {velocity} AU/year")
+        print(f"the final closest distance is {distance} AU")
+        print(f"The final increments were: vel={vel_step} and angle={angle_step}")
+        return angle, velocity
+
+    def calculate_trajectory(self, angle_nums=15, vel_nums=7, angle_step=0.1, vel_step=0.1, max_years=1, max_depth=200,
+                             optimizer="hill_climb", workers=None, max_iterations=200, max_evaluations=None,
+                             time_limit=None, callback=None):
         """
         this method combines search_rage and hill_climb to give calculate the optimal launch conditions
+        with optimizer="pattern_search" the parallel pattern_search method is used instead of hill_climb,
+        with at most max_iterations iterations per refinement. max_evaluations and time_limit (in seconds) then
+        limit the simulations and the time of all the refinements together, and callback is passed to
+        pattern_search
+        """
+        if optimizer == "pattern_search":
+            budget = {"start": time.perf_counter(), "evaluations": 0}
+            with ProcessPoolExecutor(workers) as executor:
+                refine = functools.partial(self.pattern_search, max_evaluations=max_evaluations,
+                                           time_limit=time_limit, workers=workers, executor=executor,
+                                           callback=callback, budget=budget)
+                # the limit on the iterations takes the place of max_depth, which only applies to hill_climb
+                return self.refine_trajectory(angle_nums, vel_nums, angle_step, vel_step, max_years, max_iterations,
+                                              refine, executor)
+        return self.refine_trajectory(angle_nums, vel_nums, angle_step, vel_step, max_years, max_depth,
+                                      self.hill_climb)
+
+    def refine_trajectory(self, angle_nums, vel_nums, angle_step, vel_step, max_years, max_depth, refine,
+                          executor=None):
+        """
+        runs search_range, in the executor if one is given, and then refines the solution with the given method
+        while halving the timestep
         """
         # the search_range method is used to produce an initial guess for the hill_climb method
         timestep = 0.001
         self.change_time_step(timestep)
-        initial_search = self.search_range(angle_nums, vel_nums, max_years)
+        initial_search = self.search_range(angle_nums, vel_nums, max_years, executor)
 
         # the answer from the search_range method becomes the initial guess fo the hill_climb method
         initial_distance = initial_search[1][0]
         initial_angle = initial_search[0][0]
         initial_vel = initial_search[0][1]
 
-        temp_solution = self.hill_climb(initial_distance, initial_angle, initial_vel, angle_step, vel_step, max_years, max_depth)
+        temp_solution = refine(initial_distance, initial_angle, initial_vel, angle_step, vel_step, max_years, max_depth)
 
         timestep = timestep / 2
         angle_step = angle_step * 1 / 3
@@ -167,7 +312,7 @@ class MarsMission:
         self.change_time_step(timestep)
         initial_distance = self.create_simulation(temp_solution[0], temp_solution[1], max_years)[0]
         temp_solution_old = temp_solution
-        temp_solution = self.hill_climb(initial_distance, temp_solution[0], temp_solution[1], angle_step, vel_step,
+        temp_solution = refine(initial_distance, temp_solution[0], temp_solution[1], angle_step, vel_step,
                                         max_years, max_depth)
         while temp_solution != temp_solution_old:
             timestep = timestep/2
@@ -177,12 +322,13 @@ class MarsMission:
 
             initial_distance = self.create_simulation(temp_solution[0], temp_solution[1], max_years)[0]
             temp_solution_old = temp_solution
-            temp_solution = self.hill_climb(initial_distance, temp_solution[0], temp_solution[1], angle_step, vel_step,
+            temp_solution = refine(initial_distance, temp_solution[0], temp_solution[1], angle_step, vel_step,
                                             max_years, max_depth)
 
         # the final solutions are printed
         print(f"Final solution: {temp_solution}")
         print(f"Final timestep: {timestep}")
+        return temp_solution
 
     def change_time_step(self, new_time_step):
         """
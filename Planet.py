@@ -5,6 +5,10 @@ class Planet:
     """
     represents a planet that affects other with its gravity and is affected by the gravity of others
     """
+    # slots remove the per instance __dict__, which matters when many planets are copied or created
+    __slots__ = ("mass", "pos", "pos_old", "vel", "name", "acc", "acc_old", "force", "colour", "potential",
+                 "new_years_list")
+
     def __init__(self, mass, position, velocity, name="unnamed", colour=(0, 0, 0)):
         self.mass = mass
         self.pos = position
@@ -72,13 +76,9 @@ class Planet:
             # is given as default value
             return float('inf'), float('inf')
         else:
-            average_period = self.new_years_list[-1] / (len(self.new_years_list) - 1)
-            variance = 0
-            for i in range(len(self.new_years_list)-1):
-                period = self.new_years_list[i+1] - self.new_years_list[i]
-                variance += (period - average_period)**2
-            variance = variance / (len(self.new_years_list)-1)
-            standard_deviation = np.sqrt(variance)
+            periods = np.diff(self.new_years_list)
+            average_period = self.new_years_list[-1] / len(periods)
+            standard_deviation = np.sqrt(np.mean((periods - average_period) ** 2))
             return average_period, standard_deviation
 
     def get_kinetic_energy(self):
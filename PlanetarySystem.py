@@ -1,6 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 from Planet import Planet
 
 
@@ -157,47 +155,8 @@ class PlanetarySystem:
         """
         initializes and runs simulation concurrantly with an animation
         """
-
-        max_orb = np.sqrt(np.dot(self.planets[-1].pos, self.planets[-1].pos))
-
-        # creates a circular patch coreesponding to each planet
-        self.patches = []
-
-        for planet in self.planets:
-            if planet.name == "sun":
-                self.patches.append(plt.Circle(planet.pos, max_orb * 0.04, color=planet.colour, animated=True))
-            elif planet.name == "jupiter":
-                self.patches.append(plt.Circle(planet.pos, max_orb * 0.02, color=planet.colour, animated=True))
-            elif planet.name == "rocket":
-                self.patches.append(plt.Circle(planet.pos, max_orb * 0.005, color=planet.colour, animated=True))
-            else:
-                self.patches.append(plt.Circle(planet.pos, max_orb * 0.01, color=planet.colour, animated=True))
-
-        # create plot elements
-        plt.style.use('dark_background')
-        fig = plt.figure()
-        ax = plt.axes()
-
-        for i in self.patches:
-            ax.add_patch(i)
-
-        # set up the axes
-        lim = 1.2 * max_orb
-        ax.axis("scaled")
-        ax.set_xlim(-lim, lim)
-        ax.set_ylim(-lim, lim)
-
-        # create the animator
-        self.anim = FuncAnimation(fig, self.animate, frames=self.limit, repeat=False, interval=5, blit=True)
-
-        # initialization of beeman integration
-        self.update_forces()
-        for planet in self.planets:
-            planet.acc = planet.force / planet.mass
-            planet.acc_old = planet.acc
-
-        # show the plot
-        plt.show()
+        from Plotting import run_animation
+        run_animation(self)
 
     def animate(self, i):
         """
@@ -217,26 +176,16 @@ class PlanetarySystem:
         """
         generates a graph of the energy history of the system
         """
-        skip = 1
-        plt.style.use("default")
-        x_values = np.linspace(0, self.total_time, num=len(self.energy_history))
-        plt.ylabel("Total energy (joules)")
-        plt.xlabel("Time elapsed (earth years)")
-        plt.title("Energy vs Time Euler (timestep=0.001)")
-        plt.plot(x_values[::skip], self.energy_history[::skip])
-        plt.show()
+        from Plotting import display_energy_graph
+        display_energy_graph(self)
 
     def print_energy_stats(self):
         """
         prints the average energy of the system and the associated deviation
         """
-        mean = sum(self.energy_history) / len(self.energy_history)
-        variance = 0
-        for energy in self.energy_history:
-            variance += (energy - mean)**2
-
-        variance = variance / len(self.energy_history)
-        deviation = np.sqrt(variance)
+        energy = np.array(self.energy_history)
+        mean = energy.mean()
+        deviation = energy.std()
         print(f"The mean energy was {mean} Joules with a standard deviation of {deviation} Joules")
 
     def print_years(self):
@@ -294,71 +243,37 @@ class PlanetarySystem:
             fileout.write(f"{self.planets[-1].pos[0]}|{self.planets[-1].pos[1]}\n")
         fileout.close()
 
-    def run_animation_from_file(self, filename):
+    def record_trajectory(self, filename):
         """
-        Reads the data from an already calculated simulation and animates it
+        initializes and runs the simulation for the specified number of steps, and saves the position and velocity
+        of the planets at the start and after every step to a .npy file of shape (steps + 1, planets, 4)
+        which can be loaded with Trajectory.load_recording and used by the functions of Analysis
         """
-        inputdata = []
+        steps = int(self.limit)
+        recording = np.lib.format.open_memmap(filename, mode="w+", dtype=np.float64,
+                                              shape=(steps + 1, len(self.planets), 4))
 
-        # opens transfers all the data that are not commends from the file to the input data list
-        filein = open(filename, "r")
-        for line in filein.readlines():
-            if not line.startswith("#"):
-                inputdata.append(line.strip().split(","))
-        filein.close()
-
-        # loads the colours and removes them from the data
-        colours = inputdata[0]
-        inputdata.pop(0)
-
-        # translates the coordinates from string to floats
-        for i, line in enumerate(inputdata):
-            for j, temp_coord in enumerate(line):
-                temp = temp_coord.split("|")
-                coordinates = [float(temp[0]), float(temp[1])]
-                line[j] = coordinates
-
-        inputdata = inputdata[::90]
-
-        self.patches = []
-
-        max_orb = inputdata[0][-1][0]
-
-        # initializes the patches
-        self.patches.append(plt.Circle(inputdata[0][0], max_orb * 0.04, color=colours[0], animated=True))
-        for i in range(1, len(inputdata[0])):
-            self.patches.append(plt.Circle(inputdata[0][i], max_orb * 0.01, color=colours[i], animated=True))
-
-        # create plot elements
-        plt.style.use('dark_background')
-        fig = plt.figure()
-        ax = plt.axes()
-
-        for i in self.patches:
-            ax.add_patch(i)
-
-        # set up the axes
-        lim = 1.2 * max_orb
-        ax.axis("scaled")
-        ax.set_xlim(-lim, lim)
-        ax.set_ylim(-lim, lim)
-        plt.ylabel("Y position (AU)")
-        plt.xlabel("X position (AU)")
-
-        self.positions_from_file = inputdata
-
-        # create the animator
-        anim = FuncAnimation(fig, self.animate_from_file, frames=len(inputdata), repeat=False, interval=30
-                             , blit=True)
-
-        # initialization of beeman integration
+        # initializes the planets acceleration
         self.update_forces()
         for planet in self.planets:
             planet.acc = planet.force / planet.mass
             planet.acc_old = planet.acc
 
-        # saves the animation to file
-        anim.save('whatever.gif', writer='pillow', fps=30)
+        for i in range(steps + 1):
+            if i > 0:
+                self.perform_step()
+            for j, planet in enumerate(self.planets):
+                recording[i, j, :2] = planet.pos
+                recording[i, j, 2:] = planet.vel
+        recording.flush()
+
+    def run_animation_from_file(self, filename, skip=90, output="whatever.gif"):
+        """
+        Reads the data from an already calculated simulation and animates it
+        skip is the number of simulation steps between frames, see Renderer.render_trajectory for a faster version
+        """
+        from Plotting import run_animation_from_file
+        run_animation_from_file(self, filename, skip, output)
 
     def animate_from_file(self, i):
         """
@@ -0,0 +1,132 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation
+
+
+def run_animation(system):
+    """
+    initializes and runs simulation concurrantly with an animation
+    """
+
+    max_orb = np.sqrt(np.dot(system.planets[-1].pos, system.planets[-1].pos))
+
+    # creates a circular patch coreesponding to each planet
+    system.patches = []
+
+    for planet in system.planets:
+        if planet.name == "sun":
+            system.patches.append(plt.Circle(planet.pos, max_orb * 0.04, color=planet.colour, animated=True))
+        elif planet.name == "jupiter":
+            system.patches.append(plt.Circle(planet.pos, max_orb * 0.02, color=planet.colour, animated=True))
+        elif planet.name == "rocket":
+            system.patches.append(plt.Circle(planet.pos, max_orb * 0.005, color=planet.colour, animated=True))
+        else:
+            system.patches.append(plt.Circle(planet.pos, max_orb * 0.01, color=planet.colour, animated=True))
+
+    # create plot elements
+    plt.style.use('dark_background')
+    fig = plt.figure()
+    ax = plt.axes()
+
+    for i in system.patches:
+        ax.add_patch(i)
+
+    # set up the axes
+    lim = 1.2 * max_orb
+    ax.axis("scaled")
+    ax.set_xlim(-lim, lim)
+    ax.set_ylim(-lim, lim)
+
+    # create the animator
+    system.anim = FuncAnimation(fig, system.animate, frames=system.limit, repeat=False, interval=5, blit=True)
+
+    # initialization of beeman integration
+    system.update_forces()
+    for planet in system.planets:
+        planet.acc = planet.force / planet.mass
+        planet.acc_old = planet.acc
+
+    # show the plot
+    plt.show()
+
+
+def display_energy_graph(system):
+    """
+    generates a graph of the energy history of the system
+    """
+    skip = 1
+    plt.style.use("default")
+    x_values = np.linspace(0, system.total_time, num=len(system.energy_history))
+    plt.ylabel("Total energy (joules)")
+    plt.xlabel("Time elapsed (earth years)")
+    plt.title("Energy vs Time Euler (timestep=0.001)")
+    plt.plot(x_values[::skip], system.energy_history[::skip])
+    plt.show()
+
+
+def run_animation_from_file(system, filename, skip=90, output="whatever.gif"):
+    """
+    Reads the data from an already calculated simulation and animates it
+    skip is the number of simulation steps between frames, see Renderer.render_trajectory for a faster version
+    """
+    inputdata = []
+
+    # opens transfers all the data that are not commends from the file to the input data list
+    filein = open(filename, "r")
+    for line in filein.readlines():
+        if not line.startswith("#"):
+            inputdata.append(line.strip().split(","))
+    filein.close()
+
+    # loads the colours and removes them from the data
+    colours = inputdata[0]
+    inputdata.pop(0)
+
+    # translates the coordinates from string to floats
+    for i, line in enumerate(inputdata):
+        for j, temp_coord in enumerate(line):
+            temp = temp_coord.split("|")
+            coordinates = [float(temp[0]), float(temp[1])]
+            line[j] = coordinates
+
+    inputdata = inputdata[::skip]
+
+    system.patches = []
+
+    max_orb = inputdata[0][-1][0]
+
+    # initializes the patches
+    system.patches.append(plt.Circle(inputdata[0][0], max_orb * 0.04, color=colours[0], animated=True))
+    for i in range(1, len(inputdata[0])):
+        system.patches.append(plt.Circle(inputdata[0][i], max_orb * 0.01, color=colours[i], animated=True))
+
+    # create plot elements
+    plt.style.use('dark_background')
+    fig = plt.figure()
+    ax = plt.axes()
+
+    for i in system.patches:
+        ax.add_patch(i)
+
+    # set up the axes
+    lim = 1.2 * max_orb
+    ax.axis("scaled")
+    ax.set_xlim(-lim, lim)
+    ax.set_ylim(-lim, lim)
+    plt.ylabel("Y position (AU)")
+    plt.xlabel("X position (AU)")
+
+    system.positions_from_file = inputdata
+
+    # create the animator
+    anim = FuncAnimation(fig, system.animate_from_file, frames=len(inputdata), repeat=False, interval=30
+                         , blit=True)
+
+    # initialization of beeman integration
+    system.update_forces()
+    for planet in system.planets:
+        planet.acc = planet.force / planet.mass
+        planet.acc_old = planet.acc
+
+    # saves the animation to file
+    anim.save(output, writer='pillow', fps=30)
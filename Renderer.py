@@ -0,0 +1,207 @@
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+from multiprocessing import Pool
+import numpy as np
+from Trajectory import load_trajectory
+
+
+def render_chunk(chunk):
+    """
+    renders a range of frames and encodes them into one segment of the output, runs in a worker process
+    gif segments are written with pillow, other formats are piped to ffmpeg
+    the chunk contains the positions of its frames preceded by the positions needed for the trails
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from PIL import Image
+
+    positions, colours, history, segment, max_orb, size, dpi, trail, fps = chunk
+    gif = segment.lower().endswith(".gif")
+
+    # same sizes and layout as PlanetarySystem.run_animation_from_file
+    lim = 1.2 * max_orb
+
+    with plt.style.context("dark_background"):
+        fig = plt.figure(figsize=size, dpi=dpi)
+        ax = plt.axes()
+        patches = [plt.Circle(positions[history, 0], max_orb * 0.04, color=colours[0])]
+        for i in range(1, len(colours)):
+            patches.append(plt.Circle(positions[history, i], max_orb * 0.01, color=colours[i]))
+        for patch in patches:
+            ax.add_patch(patch)
+
+        lines = []
+        if trail > 0:
+            for colour in colours:
+                lines.append(ax.plot([], [], color=colour, linewidth=0.5, alpha=0.6)[0])
+
+        ax.axis("scaled")
+        ax.set_xlim(-lim, lim)
+        ax.set_ylim(-lim, lim)
+        ax.set_ylabel("Y position (AU)")
+        ax.set_xlabel("X position (AU)")
+
+        frames = []
+        encoder = None
+        for i in range(history, len(positions)):
+            for j, patch in enumerate(patches):
+                patch.center = positions[i, j]
+            for j, line in enumerate(lines):
+                start = max(0, i - trail)
+                line.set_data(positions[start:i + 1, j, 0], positions[start:i + 1, j, 1])
+            fig.canvas.draw()
+            image = np.asarray(fig.canvas.buffer_rgba())
+
+            if gif:
+                # every segment uses the same fixed palette, so the segments can be joined byte by byte
+                frames.append(Image.fromarray(image[..., :3]).convert("P", palette=Image.Palette.WEB,
+                                                                      dither=Image.Dither.NONE))
+                continue
+            if encoder is None:
+                encoder = subprocess.Popen([get_ffmpeg(), "-y", "-loglevel", "error", "-f", "rawvideo",
+                                            "-pix_fmt", "rgba", "-s", f"{image.shape[1]}x{image.shape[0]}",
+                                            "-framerate", str(fps), "-i", "-",
+                                            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p",
+                                            segment], stdin=subprocess.PIPE)
+            encoder.stdin.write(image.tobytes())
+        plt.close(fig)
+
+    if gif:
+        frames[0].save(segment, save_all=True, append_images=frames[1:], duration=1000 / fps, loop=0)
+    else:
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            raise RuntimeError(f"ffmpeg could not encode {segment}")
+    return segment
+
+
+def get_gif_frames_start(data):
+    """
+    returns the position in a gif file where the first frame starts,
+    after the header, the global colour table and the application extensions
+    """
+    position = 13
+    flags = data[10]
+    if flags & 0x80:
+        position += 3 * 2 ** ((flags & 0x07) + 1)
+    # application extensions (e.g. the loop count) are made of sub-blocks that end with an empty one
+    while data[position] == 0x21 and data[position + 1] == 0xFF:
+        position += 2
+        while data[position] != 0:
+            position += data[position] + 1
+        position += 1
+    return position
+
+
+def stitch_segments(segments, output):
+    """
+    joins the encoded segments into the output without encoding any frame again, gif segments are joined
+    byte by byte and other formats with the concat demuxer of ffmpeg
+    """
+    if output.lower().endswith(".gif"):
+        fileout = open(output, "wb")
+        for i, segment in enumerate(segments):
+            filein = open(segment, "rb")
+            data = filein.read()
+            filein.close()
+            # the header of the first segment is kept, the trailer byte of all but the last is dropped
+            start = 0 if i == 0 else get_gif_frames_start(data)
+            end = len(data) if i == len(segments) - 1 else len(data) - 1
+            fileout.write(data[start:end])
+        fileout.close()
+    else:
+        list_name = os.path.join(os.path.dirname(segments[0]), "segments.txt")
+        filelist = open(list_name, "w")
+        for segment in segments:
+            filelist.write(f"file '{segment}'\n")
+        filelist.close()
+        subprocess.run([get_ffmpeg(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_name,
+                        "-c", "copy", output], check=True)
+
+
+def get_ffmpeg():
+    """
+    returns the path of the ffmpeg executable configured in matplotlib, raises an error if it cannot be found
+    """
+    import matplotlib
+    ffmpeg = shutil.which(matplotlib.rcParams["animation.ffmpeg_path"])
+    if ffmpeg is None:
+        raise RuntimeError(f"ffmpeg ({matplotlib.rcParams['animation.ffmpeg_path']}) was not found, "
+                           f"it is needed for any output other than gif")
+    return ffmpeg
+
+
+def render_trajectory(trajectory, output="trajectory.gif", skip=90, size=(6.4, 4.8), dpi=100, trail=0, fps=30,
+                      workers=None, segment_frames=100):
+    """
+    renders a trajectory to a gif or mp4 without a window. The frames are split into segments of at most
+    segment_frames frames, which worker processes render and encode independently, and the segments are then
+    joined without encoding again.
+    trajectory is either the name of a file written by PlanetarySystem.simulate_to_file
+    or a tuple of colours and positions as returned by load_trajectory
+    skip is the number of simulation steps between frames and trail the number of frames kept behind each planet
+    """
+    if isinstance(trajectory, str):
+        colours, positions = load_trajectory(trajectory)
+    else:
+        colours, positions = trajectory
+    positions = np.asarray(positions)[::skip]
+    frame_count = len(positions)
+    # the initial position of the outermost planet sets the scale, as in PlanetarySystem.run_animation_from_file
+    max_orb = positions[0, -1, 0]
+
+    extension = os.path.splitext(output)[1]
+    if extension.lower() != ".gif":
+        # fails before any frame is rendered
+        get_ffmpeg()
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # at least one segment per worker so that every worker has frames to render
+    segment_count = max(min(workers, frame_count), -(-frame_count // segment_frames))
+
+    segment_dir = tempfile.mkdtemp(prefix="render_")
+    try:
+        # each segment is a contiguous range of frames with the previous frames it needs for the trails
+        bounds = np.linspace(0, frame_count, segment_count + 1).astype(int)
+        chunks = []
+        for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            history = min(start, trail)
+            segment = os.path.join(segment_dir, f"segment_{i:05d}{extension}")
+            chunks.append((positions[start - history:end], colours, history, segment, max_orb, size, dpi, trail,
+                           fps))
+
+        if workers == 1:
+            segments = [render_chunk(chunk) for chunk in chunks]
+        else:
+            with Pool(workers) as pool:
+                segments = pool.map(render_chunk, chunks)
+
+        stitch_segments(segments, output)
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="renders a trajectory file to a gif or mp4")
+    parser.add_argument("trajectory", help="file written by PlanetarySystem.simulate_to_file")
+    parser.add_argument("-o", "--output", default="trajectory.gif")
+    parser.add_argument("--skip", type=int, default=90, help="simulation steps between frames")
+    parser.add_argument("--size", type=float, nargs=2, default=(6.4, 4.8), help="figure size in inches")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--trail", type=int, default=0, help="number of past frames drawn behind each planet")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--segment-frames", type=int, default=100, help="maximum number of frames per segment")
+    args = parser.parse_args()
+    render_trajectory(args.trajectory, args.output, args.skip, tuple(args.size), args.dpi, args.trail, args.fps,
+                      args.workers, args.segment_frames)
+
+
+if __name__ == "__main__":
+    main()
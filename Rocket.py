@@ -7,6 +7,8 @@ class Rocket(Planet):
     represents the rocket that is sent to mars
     expands the Planet class
     """
+    __slots__ = ("initial_velocity", "angle", "time", "mars", "closest_dist", "closest_time")
+
     def __init__(self, earth_position, earth_velocity, mass, distance, angle, velocity, mars):
         self.initial_velocity = velocity
         self.angle = angle
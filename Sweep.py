@@ -0,0 +1,200 @@
+import itertools
+import json
+import os
+import sqlite3
+import time
+from multiprocessing import Process
+import numpy as np
+from MarsMission import MarsMission
+
+# status of a trial in the database
+PENDING = 0
+RUNNING = 1
+DONE = 2
+FAILED = 3
+
+
+class Sweep:
+    """
+    a sweep over launch conditions (angle, speed, epoch, timestep) of the mars mission, stored in a sqlite database.
+    several worker processes take trials from the database at once and store each result as soon as it is finished,
+    so the results can be read while the sweep runs and an interrupted sweep continues where it stopped
+    """
+    def __init__(self, database):
+        self.database = database
+        connection = self.connect()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS trials (
+                id INTEGER PRIMARY KEY,
+                angle REAL, velocity REAL, epoch REAL, timestep REAL,
+                status INTEGER DEFAULT 0, worker INTEGER,
+                closest_dist REAL, closest_time REAL, finished REAL, error TEXT);
+            DROP INDEX IF EXISTS trials_status;
+            CREATE INDEX IF NOT EXISTS trials_queue ON trials (status, timestep, epoch, id);
+            CREATE INDEX IF NOT EXISTS trials_finished ON trials (status, finished);
+            CREATE INDEX IF NOT EXISTS trials_closest_dist ON trials (closest_dist);
+        """)
+        connection.close()
+
+    def connect(self):
+        """
+        opens a new connection to the database, each process needs its own
+        """
+        return sqlite3.connect(self.database, timeout=60)
+
+    def configure(self, rocket_mass, min_vel, max_vel, distance_earth, goal_distance, filename_read, max_years):
+        """
+        stores the arguments of MarsMission and the duration of each simulation in years
+        """
+        settings = {"rocket_mass": rocket_mass, "min_vel": min_vel, "max_vel": max_vel,
+                    "distance_earth": distance_earth, "goal_distance": goal_distance,
+                    "filename_read": os.path.abspath(filename_read), "max_years": max_years}
+        connection = self.connect()
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO settings VALUES (?, ?)",
+                                   [(key, json.dumps(value)) for key, value in settings.items()])
+        connection.close()
+
+    def get_settings(self):
+        connection = self.connect()
+        settings = {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM settings")}
+        connection.close()
+        return settings
+
+    def create_mission(self):
+        """
+        creates the MarsMission described by the stored settings, returns it with the duration of each simulation
+        """
+        settings = self.get_settings()
+        max_years = settings.pop("max_years")
+        return MarsMission(**settings), max_years
+
+    def add_trials(self, trials):
+        """
+        adds trials given as (angle, velocity, epoch, timestep) tuples
+        """
+        connection = self.connect()
+        with connection:
+            connection.executemany("INSERT INTO trials (angle, velocity, epoch, timestep) VALUES (?, ?, ?, ?)",
+                                   ((float(a), float(v), float(e), float(t)) for a, v, e, t in trials))
+        connection.close()
+
+    def add_grid(self, angle_nums, vel_nums, epochs=(0,), timesteps=(0.001,)):
+        """
+        adds every combination of the given epochs and timesteps with angle_nums angles and vel_nums speeds,
+        spread over the whole circle and the allowed speed range in the same way as MarsMission.search_range
+        """
+        settings = self.get_settings()
+        angles = 2 * np.pi * np.arange(angle_nums) / angle_nums
+        velocities = np.linspace(settings["min_vel"], settings["max_vel"], vel_nums)
+        self.add_trials(itertools.product(angles, velocities, epochs, timesteps))
+
+    def claim(self, connection, worker, count):
+        """
+        marks up to count pending trials as running for the given worker and returns them
+        """
+        # the immediate transaction stops two workers from claiming the same trials
+        connection.execute("BEGIN IMMEDIATE")
+        trials = connection.execute("SELECT id, angle, velocity, epoch, timestep FROM trials WHERE status = ? "
+                                    "ORDER BY timestep, epoch, id LIMIT ?", (PENDING, count)).fetchall()
+        connection.executemany("UPDATE trials SET status = ?, worker = ? WHERE id = ?",
+                               [(RUNNING, worker, trial[0]) for trial in trials])
+        connection.commit()
+        return trials
+
+    def reset_unfinished(self):
+        """
+        returns the trials left running by an interrupted sweep to the queue
+        """
+        connection = self.connect()
+        with connection:
+            connection.execute("UPDATE trials SET status = ?, worker = NULL WHERE status = ?", (PENDING, RUNNING))
+        connection.close()
+
+    def run(self, workers=None, batch_size=8):
+        """
+        runs all the pending trials with the given number of worker processes, must not be called while another
+        run on the same database is still going
+        """
+        self.reset_unfinished()
+        workers = workers or os.cpu_count() or 1
+        processes = [Process(target=run_worker, args=(self.database, i, batch_size)) for i in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            if process.exitcode != 0:
+                print(f"worker {processes.index(process)} stopped with exit code {process.exitcode}, "
+                      f"its unfinished trials will be run again by the next run")
+
+    def get_progress(self):
+        """
+        returns the number of pending, running, finished and failed trials
+        """
+        connection = self.connect()
+        counts = dict(connection.execute("SELECT status, COUNT(*) FROM trials GROUP BY status").fetchall())
+        connection.close()
+        return counts.get(PENDING, 0), counts.get(RUNNING, 0), counts.get(DONE, 0), counts.get(FAILED, 0)
+
+    def get_failures(self):
+        """
+        returns the failed trials as (angle, velocity, epoch, timestep, error) tuples
+        """
+        connection = self.connect()
+        failures = connection.execute("SELECT angle, velocity, epoch, timestep, error FROM trials WHERE status = ?",
+                                      (FAILED,)).fetchall()
+        connection.close()
+        return failures
+
+    def get_best(self, count=10):
+        """
+        returns the finished trials with the smallest closest approach as
+        (angle, velocity, epoch, timestep, closest_dist, closest_time) tuples
+        """
+        connection = self.connect()
+        best = connection.execute("SELECT angle, velocity, epoch, timestep, closest_dist, closest_time FROM trials "
+                                  "WHERE status = ? ORDER BY closest_dist LIMIT ?", (DONE, count)).fetchall()
+        connection.close()
+        return best
+
+    def get_results(self, finished_after=0):
+        """
+        returns all the trials finished after the given time.time() value, oldest first, as a list of
+        (angle, velocity, epoch, timestep, closest_dist, closest_time, finished) tuples
+        """
+        connection = self.connect()
+        results = connection.execute("SELECT angle, velocity, epoch, timestep, closest_dist, closest_time, finished "
+                                     "FROM trials WHERE status = ? AND finished > ? ORDER BY finished",
+                                     (DONE, finished_after)).fetchall()
+        connection.close()
+        return results
+
+
+def run_worker(database, worker, batch_size):
+    """
+    takes trials from the database and simulates them until none are left, runs in its own process
+    """
+    sweep = Sweep(database)
+    mission, max_years = sweep.create_mission()
+    connection = sweep.connect()
+    trials = sweep.claim(connection, worker, batch_size)
+    while trials:
+        for trial_id, angle, velocity, epoch, timestep in trials:
+            if mission.step != timestep:
+                mission.change_time_step(timestep)
+            try:
+                closest_dist, closest_time = mission.create_simulation(angle, velocity, max_years, epoch,
+                                                                       verbose=False)
+            except Exception as error:
+                # a failing trial is stored as failed so it is not tried again on every resume
+                with connection:
+                    connection.execute("UPDATE trials SET status = ?, error = ?, finished = ? WHERE id = ?",
+                                       (FAILED, repr(error), time.time(), trial_id))
+                continue
+            with connection:
+                connection.execute("UPDATE trials SET status = ?, closest_dist = ?, closest_time = ?, finished = ? "
+                                   "WHERE id = ?", (DONE, closest_dist, closest_time, time.time(), trial_id))
+        trials = sweep.claim(connection, worker, batch_size)
+    connection.close()
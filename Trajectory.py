@@ -0,0 +1,28 @@
+import io
+import numpy as np
+
+
+def load_trajectory(filename):
+    """
+    reads a file written by PlanetarySystem.simulate_to_file and returns the list of colours and
+    an array of positions with shape (number of steps, number of planets, 2)
+    the first row holds the positions after the first step, at time = step, not the initial positions
+    """
+    filein = open(filename, "r")
+    lines = [line for line in filein if not line.startswith("#")]
+    filein.close()
+
+    # the first line contains the colours, every other line contains "x|y" pairs separated by commas
+    colours = lines[0].strip().split(",")
+    text = "".join(lines[1:]).replace("|", ",")
+    positions = np.loadtxt(io.StringIO(text), delimiter=",", ndmin=2)
+    return colours, positions.reshape(len(positions), len(colours), 2)
+
+
+def load_recording(filename):
+    """
+    memory maps a file written by PlanetarySystem.record_trajectory and returns the positions and velocities,
+    both with shape (number of steps + 1, number of planets, 2)
+    """
+    recording = np.load(filename, mmap_mode="r")
+    return recording[..., :2], recording[..., 2:]